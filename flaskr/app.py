@@ -8,6 +8,12 @@ import numpy as np
 from PIL import Image, ImageOps
 import wave
 
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:  # optional; needs orjson and Flask >= 2.2, otherwise Flask's stdlib json is used
+    orjson = None
+
 # Import your custom modules using absolute imports
 from modules.image_stego import encode_image, decode_image, parse_start_location
 from modules.audio_stego import encode_audio, decode_audio, _coerce_start_seconds, _seconds_to_bit_offset
@@ -21,10 +27,39 @@ from modules.visualization import (
     analyze_stego_detection,
     create_waveform_comparison,
     extract_bit_planes,
-    analyze_complexity_segments
+    analyze_complexity_segments,
+    read_image_rgb,
+    read_image_gray
 )
 
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """jsonify() through orjson (NumPy scalars/arrays native); stdlib json for anything it rejects."""
+
+        def dumps(self, obj, **kwargs):
+            # response() passes compact separators or indent=2; orjson is compact by default
+            indent = kwargs.get('indent')
+            if kwargs.get('cls') or indent not in (None, 2):
+                return super().dumps(obj, **kwargs)
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if indent == 2:
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+            except (orjson.JSONEncodeError, TypeError):
+                return super().dumps(obj, **kwargs)
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super().loads(s, **kwargs)
+            return orjson.loads(s)
+
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 app.config['UPLOAD_FOLDER']   = os.path.join(app.root_path, 'uploads')
 app.config['DOWNLOAD_FOLDER'] = os.path.join(app.root_path, 'downloads')
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
@@ -168,19 +203,23 @@ def comprehensive_comparison():
         if file_type in ['png', 'bmp', 'gif', 'jpg', 'jpeg']:
             results['analysis_type'] = 'image'
             
+            # Decode each upload once (colour, plus grayscale for the bit planes) and share the arrays
+            cover_rgb = read_image_rgb(cover_path) if cover_path else None
+            stego_rgb = read_image_rgb(stego_path) if stego_path else None
+
             # Individual file analyses
             if cover_path:
                 results['cover_analysis'] = {
-                    'histogram': create_histogram_analysis(cover_path),
-                    'bit_planes': extract_bit_planes(cover_path),
+                    'histogram': create_histogram_analysis(cover_path, rgb=cover_rgb),
+                    'bit_planes': extract_bit_planes(cover_path, gray=read_image_gray(cover_path)),
                     'steganalysis': analyze_stego_detection(cover_path, file_type),
                     'filename': cover_filename if cover_file else None
                 }
                 
             if stego_path:
                 results['stego_analysis'] = {
-                    'histogram': create_histogram_analysis(stego_path),
-                    'bit_planes': extract_bit_planes(stego_path),
+                    'histogram': create_histogram_analysis(stego_path, rgb=stego_rgb),
+                    'bit_planes': extract_bit_planes(stego_path, gray=read_image_gray(stego_path)),
                     'steganalysis': analyze_stego_detection(stego_path, file_type),
                     'filename': stego_filename if stego_file else None
                 }
@@ -188,8 +227,10 @@ def comprehensive_comparison():
             # Comparison analyses (require both files)
             if cover_path and stego_path:
                 results['comparison_analysis'] = {
-                    'difference_map': generate_difference_map(cover_path, stego_path),
-                    'histogram_comparison': create_histogram_analysis(cover_path, stego_path=stego_path)
+                    'difference_map': generate_difference_map(cover_path, stego_path,
+                                                              cover_rgb=cover_rgb, stego_rgb=stego_rgb),
+                    'histogram_comparison': create_histogram_analysis(cover_path, stego_path=stego_path,
+                                                                      rgb=cover_rgb, stego_rgb=stego_rgb)
                 }
                 
         elif file_type in ['wav', 'mp3', 'pcm']:
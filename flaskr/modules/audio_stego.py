@@ -1,11 +1,16 @@
 import wave
+import struct
 import numpy as np
 import os
 from .key_manager import generate_embedding_sequence, validate_key
 from .utils import bytes_to_bits, bits_to_bytes
 
+# Header: MAGIC(4)='STG1' | VER(1) | NAME_LEN(2, big) | PAYLOAD_LEN(4, big), followed by NAME
+_HDR = struct.Struct('>4sBHI')
+_LEGACY_HDR = struct.Struct('>I')
 
-def _load_wav_as_array(path):
+
+def _load_wav_as_array(path, writable=True):
     with wave.open(path, 'rb') as wf:
         n_channels = wf.getnchannels()
         sampwidth = wf.getsampwidth()
@@ -20,7 +25,9 @@ def _load_wav_as_array(path):
     else:
         raise ValueError('Unsupported WAV sample width: {} bytes'.format(sampwidth))
 
-    samples = np.frombuffer(frames, dtype=dtype).copy()
+    samples = np.frombuffer(frames, dtype=dtype)
+    if writable:
+        samples = samples.copy()
     return samples, n_channels, sampwidth, framerate
 
 
@@ -29,7 +36,8 @@ def _write_wav_from_array(path, samples, n_channels, sampwidth, framerate):
         wf.setnchannels(n_channels)
         wf.setsampwidth(sampwidth)
         wf.setframerate(framerate)
-        wf.writeframes(samples.tobytes())
+        # wave accepts any bytes-like object; pass the sample buffer without a tobytes() copy
+        wf.writeframes(np.ascontiguousarray(samples).data)
 
 def _coerce_start_seconds(value):
     """Return non-negative integer seconds for audio start offset.
@@ -67,19 +75,23 @@ def _embed_bits_into_samples(samples: np.ndarray, bits, lsb_count: int, key: str
     if start_location + total_bits > total_slots:
         raise ValueError('Payload too large for selected LSBs and start time')
 
-    positions = generate_embedding_sequence(key, total_bits, total_slots, start_location=start_location)
+    positions = np.asarray(generate_embedding_sequence(key, total_bits, total_slots, start_location=start_location),
+                           dtype=np.int64)
+    bit_vals = (np.asarray(bits) == 1).astype(samples.dtype)
 
-    # Embed each bit into the specified bit position of the target sample
-    for i, b in enumerate(bits):
-        bit_val = 1 if (b == 1 or b == '1' or b is True) else 0
-        slot = positions[i]
-        sample_index = slot // lsb_count
-        bit_index = slot % lsb_count  # 0 = LSB
-        # Clear and set the bit_index bit
-        samples[sample_index] = (samples[sample_index] & ~(1 << bit_index)) | (bit_val << bit_index)
+    sample_index = positions // lsb_count
+    bit_index = positions % lsb_count  # 0 = LSB
+    # Slots are unique, so within one bit index every sample is hit at most once and
+    # a fancy-indexed clear-and-set is safe; a sample may still take several bit indices
+    for b in range(lsb_count):
+        sel = bit_index == b
+        idx = sample_index[sel]
+        keep = ~np.array(1 << b, dtype=samples.dtype)
+        samples[idx] = (samples[idx] & keep) | (bit_vals[sel] << b)
 
 
-def _extract_bits_from_samples(samples: np.ndarray, num_bits: int, lsb_count: int, key: str, start_location: int):
+def _extract_bits_from_samples(samples: np.ndarray, num_bits: int, lsb_count: int, key: str, start_location: int,
+                                order=None):
     if lsb_count < 1 or lsb_count > 8:
         raise ValueError('lsb_count must be between 1 and 8')
 
@@ -89,14 +101,15 @@ def _extract_bits_from_samples(samples: np.ndarray, num_bits: int, lsb_count: in
     if start_location + num_bits > total_slots:
         raise ValueError('Requested extraction exceeds available capacity')
 
-    positions = generate_embedding_sequence(key, num_bits, total_slots, start_location=start_location)
-    out_bits = []
-    for slot in positions:
-        sample_index = slot // lsb_count
-        bit_index = slot % lsb_count
-        bit_val = (int(samples[sample_index]) >> bit_index) & 1
-        out_bits.append(1 if bit_val else 0)
-    return out_bits
+    if order is None:
+        positions = generate_embedding_sequence(key, num_bits, total_slots, start_location=start_location)
+    else:
+        # Precomputed full slot order; any prefix matches a fresh num_bits sequence
+        positions = order[:num_bits]
+    positions = np.asarray(positions, dtype=np.int64)
+    # Gather every addressed sample and shift its bit down in one pass (uint8 0/1 array)
+    vals = samples[positions // lsb_count].astype(np.int32)
+    return ((vals >> (positions % lsb_count)) & 1).astype(np.uint8)
 
 
 def encode_audio(cover_path, payload_path, key, lsb_count, start_location):
@@ -139,7 +152,7 @@ def encode_audio(cover_path, payload_path, key, lsb_count, start_location):
         name_bytes = name_bytes[:65535]
         name_len = len(name_bytes)
 
-    header = b'STG1' + bytes([1]) + name_len.to_bytes(2, 'big') + payload_len.to_bytes(4, 'big') + name_bytes
+    header = _HDR.pack(b'STG1', 1, name_len, payload_len) + name_bytes
     all_bytes = header + payload
     bits = bytes_to_bits(all_bytes)
 
@@ -173,7 +186,8 @@ def decode_audio(stego_path, key, lsb_count, start_location=0):
     except Exception as exc:
         raise ValueError('Invalid LSB count') from exc
 
-    samples, n_channels, sampwidth, framerate = _load_wav_as_array(stego_path)
+    # Decoding only reads samples, so view the frame bytes without copying
+    samples, n_channels, sampwidth, framerate = _load_wav_as_array(stego_path, writable=False)
     total_slots = samples.size * lsb
     start_seconds = _coerce_start_seconds(start_location)
     start_offset_bits = _seconds_to_bit_offset(start_seconds, framerate, n_channels, lsb)
@@ -181,18 +195,20 @@ def decode_audio(stego_path, key, lsb_count, start_location=0):
         raise ValueError('Start time exceeds audio length')
 
     # Try new header first: need 11 bytes (88 bits) to parse magic, version, name_len, payload_len
-    hdr_len_bytes_fixed = 11
+    hdr_len_bytes_fixed = _HDR.size
     # If not enough capacity beyond start, fail early with a clear message
     if (hdr_len_bytes_fixed * 8) > (total_slots - int(start_offset_bits)):
         raise ValueError('Decoding failed: insufficient capacity at start position (check start time)')
 
-    hdr_bits = _extract_bits_from_samples(samples, hdr_len_bytes_fixed * 8, lsb, str(key), int(start_offset_bits))
+    # Shuffle the slot order once; header, body and legacy reads all take prefixes of it
+    order = np.asarray(generate_embedding_sequence(str(key), total_slots, total_slots,
+                                                   start_location=int(start_offset_bits)), dtype=np.int64)
+
+    hdr_bits = _extract_bits_from_samples(samples, hdr_len_bytes_fixed * 8, lsb, str(key), int(start_offset_bits), order)
     hdr = bits_to_bytes(hdr_bits)
 
-    if len(hdr) >= 11 and hdr[:4] == b'STG1':
-        ver = hdr[4]
-        name_len = int.from_bytes(hdr[5:7], 'big')
-        payload_len = int.from_bytes(hdr[7:11], 'big')
+    if len(hdr) >= hdr_len_bytes_fixed and hdr[:4] == b'STG1':
+        _, ver, name_len, payload_len = _HDR.unpack(hdr[:hdr_len_bytes_fixed])
         if name_len < 0 or payload_len < 0 or name_len > 65535:
             raise ValueError('Decoding failed: invalid header (check key/lsb/start time)')
 
@@ -201,10 +217,10 @@ def decode_audio(stego_path, key, lsb_count, start_location=0):
         # Validate against capacity beyond the start offset
         if total_bits > (total_slots - int(start_offset_bits)):
             raise ValueError('Decoding failed: header implies size beyond capacity (check key/lsb/start time)')
-        all_bits = _extract_bits_from_samples(samples, total_bits, lsb, str(key), int(start_offset_bits))
+        all_bits = _extract_bits_from_samples(samples, total_bits, lsb, str(key), int(start_offset_bits), order)
         all_bytes = bits_to_bytes(all_bits)
-        name_bytes = all_bytes[11:11 + name_len]
-        payload_bytes = all_bytes[11 + name_len:11 + name_len + payload_len]
+        name_bytes = all_bytes[hdr_len_bytes_fixed:hdr_len_bytes_fixed + name_len]
+        payload_bytes = all_bytes[hdr_len_bytes_fixed + name_len:hdr_len_bytes_fixed + name_len + payload_len]
         try:
             decoded_name = name_bytes.decode('utf-8', errors='ignore') or 'extracted.bin'
         except Exception:
@@ -231,17 +247,17 @@ def decode_audio(stego_path, key, lsb_count, start_location=0):
         # Re-extract just the first 32 bits to avoid confusion.
         if 32 > (total_slots - int(start_offset_bits)):
             raise ValueError('Decoding failed: insufficient capacity at start position (check start time)')
-        header_bits_legacy = _extract_bits_from_samples(samples, 32, lsb, str(key), int(start_offset_bits))
+        header_bits_legacy = _extract_bits_from_samples(samples, 32, lsb, str(key), int(start_offset_bits), order)
         # Convert first 32 bits (LSB-first) to a 4-byte big-endian integer
         legacy_hdr_bytes = bits_to_bytes(header_bits_legacy)
-        payload_len = int.from_bytes(legacy_hdr_bytes[:4], 'big')
+        (payload_len,) = _LEGACY_HDR.unpack(legacy_hdr_bytes[:4])
         if payload_len < 0:
             raise ValueError('Decoding failed: invalid payload length (check key/lsb/start time)')
 
         total_bits = 32 + payload_len * 8
         if total_bits > (total_slots - int(start_offset_bits)):
             raise ValueError('Decoding failed: legacy length beyond capacity (check key/lsb/start time)')
-        bits = _extract_bits_from_samples(samples, total_bits, lsb, str(key), int(start_offset_bits))
+        bits = _extract_bits_from_samples(samples, total_bits, lsb, str(key), int(start_offset_bits), order)
         payload_bits = bits[32:]
         payload_bytes = bits_to_bytes(payload_bits)
 
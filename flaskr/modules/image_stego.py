@@ -1,9 +1,27 @@
 # modules/image_stego.py
 from PIL import Image, ImageOps
 import os
+import struct
 import hashlib
-import random
-from .utils import iter_bits_lsb, pack_bits_lsb
+import inspect
+import numpy as np
+from .key_manager import seeded_permutation
+
+MAGIC = b"ACW1"
+# Header: MAGIC(4) | KEY_SIG(4) | NAME_LEN(2) | PAYLOAD_LEN(4), followed by NAME
+_HDR = struct.Struct("<4s4sHI")
+# Cover extension -> (PIL format, output extension, note). Lossy/paletted covers
+# are written as PNG so the embedded LSBs survive the save.
+_FMT = {
+    "bmp": ("BMP", "bmp", None),
+    "png": ("PNG", "png", None),
+    "gif": ("PNG", "png", "gif_converted_to_png_for_lossless_lsb"),
+    "jpg": ("PNG", "png", "jpeg_converted_to_png_for_lossless_lsb"),
+    "jpeg": ("PNG", "png", "jpeg_converted_to_png_for_lossless_lsb"),
+}
+
+# exif_transpose(in_place=...) needs Pillow >= 9.4; older releases always return a copy
+_EXIF_IN_PLACE = "in_place" in inspect.signature(ImageOps.exif_transpose).parameters
 
 def _safe_name(name: str) -> str:
     return os.path.basename(name).strip() or "payload.bin"
@@ -19,6 +37,22 @@ def calculate_image_capacity(image_file, lsb_count: int) -> int:
     w, h = img.size
     return _capacity_bytes_from_wh(w, h, k)
 
+def _open_rgb(path):
+    """Decode an image upright and as RGB.
+
+    exif_transpose() and convert() each return a full copy even when there is
+    nothing to do; here they only touch the pixels when a rotation or mode
+    change is actually needed.
+    """
+    img = Image.open(path)
+    if _EXIF_IN_PLACE:
+        ImageOps.exif_transpose(img, in_place=True)
+    else:
+        img = ImageOps.exif_transpose(img)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
+
 def _parse_start_pixel_to_byte(start_input, w, h, total_carriers):
     """Treat user input as PIXEL index; support 'x,y' too; convert to byte offset (×3)."""
     if start_input is None or str(start_input).strip() == "":
@@ -88,31 +122,56 @@ def _scattered_positions(total_carriers: int, start: int, key, w: int, h: int):
         return []
 
     # Eligible pixels are only those at or after the start pixel
-    eligible_pixels = list(range(start_pixel, n_pixels))
     seed_bytes = (f"ACW1|IMG|{w}x{h}|{key}").encode("utf-8", "ignore")
     seed = int.from_bytes(hashlib.sha256(seed_bytes).digest()[:8], "little")
-    rng = random.Random(seed)
-    rng.shuffle(eligible_pixels)
+    eligible_pixels = seeded_permutation(seed, start_pixel, n_pixels)
 
-    # Expand to byte indices in channel order (R,G,B), clipped to available carriers
-    out = []
-    out_extend = out.extend
+    # Expand to byte indices in channel order (R,G,B), clipped to available carriers;
+    # the bound is applied once up front instead of per pixel
     max_needed = total_carriers - (start_pixel * 3)
-    for p in eligible_pixels:
-        base = p * 3
-        out_extend((base, base + 1, base + 2))
-        if len(out) >= max_needed:
-            break
+    pixels = np.asarray(eligible_pixels[:(max_needed + 2) // 3], dtype=np.int64)
+    out = (pixels[:, None] * 3 + np.arange(3, dtype=np.int64)).ravel()
     return out[:max_needed]
 
+def _gather_blob(data_np, positions, k: int, n_bytes: int) -> bytes:
+    """Read the first 'n_bytes' of the embedded bitstream in one vectorized pass.
+
+    Each carrier holds k bits, most significant first; the stream itself is
+    LSB-first per byte (matching _embed_blob on the encode side).
+    """
+    need_bits = n_bytes * 8
+    need_carriers = (need_bits + k - 1) // k
+    if need_carriers > len(positions):
+        raise ValueError("Not a valid stego image for these parameters (insufficient capacity).")
+    pos = np.asarray(positions[:need_carriers], dtype=np.int64)
+    vals = data_np[pos]
+    # bitorder='big' yields b7..b0, so the last k columns are b(k-1)..b0
+    bits = np.unpackbits(vals[:, None], axis=1, bitorder="big")[:, 8 - k:].ravel()[:need_bits]
+    return np.packbits(bits, bitorder="little").tobytes()
+
+def _embed_blob(carrier, positions, blob: bytes, k: int):
+    """Embed 'blob' LSB-first into the carriers at 'positions', k bits per carrier.
+
+    One vectorized gather/scatter over all positions; they come from a keyed
+    permutation, so no split of them is cache-local and tiling only adds dispatch.
+    """
+    n = positions.size
+    bits = np.unpackbits(np.frombuffer(blob, dtype=np.uint8), bitorder="little")
+    # Zero-fill the final carrier when the stream is not a multiple of k
+    bits = np.pad(bits, (0, n * k - bits.size))
+    # First bit of each group lands in the highest of the k low bits
+    vals = np.packbits(bits.reshape(-1, k), axis=1, bitorder="big")[:, 0] >> (8 - k)
+    keep = np.uint8(0xFF ^ ((1 << k) - 1))
+    carrier[positions] = (carrier[positions] & keep) | vals
+
 def encode_image(cover_path, payload_path, key, lsb_count, start_location):
     k = int(lsb_count)
     if not (1 <= k <= 8):
         raise ValueError("LSB count must be between 1 and 8")
 
-    cover_img = ImageOps.exif_transpose(Image.open(cover_path)).convert("RGB")
+    cover_img = _open_rgb(cover_path)
     w, h = cover_img.size
-    carrier = bytearray(cover_img.tobytes())
+    carrier = np.frombuffer(cover_img.tobytes(), dtype=np.uint8).copy()
     total_carriers = len(carrier)
 
     # Compute precise (x,y) start and corresponding byte offset
@@ -122,13 +181,11 @@ def encode_image(cover_path, payload_path, key, lsb_count, start_location):
     with open(payload_path, "rb") as f:
         payload = f.read()
 
-    MAGIC = b"ACW1"
     key_bytes = str(key).encode("utf-8", "ignore")
     key_sig = hashlib.sha256(key_bytes).digest()[:4]
     name_bytes = _safe_name(payload_path).encode("utf-8", "ignore")[:65535]
     name_len = len(name_bytes)
-    # Header: MAGIC(4) | KEY_SIG(4) | NAME_LEN(2) | PAYLOAD_LEN(4) | NAME
-    header = MAGIC + key_sig + name_len.to_bytes(2, "little") + len(payload).to_bytes(4, "little") + name_bytes
+    header = _HDR.pack(MAGIC, key_sig, name_len, len(payload)) + name_bytes
     blob = header + payload
 
     total_bits = len(blob) * 8
@@ -142,35 +199,18 @@ def encode_image(cover_path, payload_path, key, lsb_count, start_location):
             f"Payload too large for starting location: needs {len(blob)} bytes, "
             f"available from start {available_from_start} bytes at k={k}"
         )
-    positions = positions_full[:carriers_needed]
-
-    bits = iter_bits_lsb(blob)
-    mask = (1 << k) - 1
-    for idx in positions:
-        try:
-            val = 0
-            for _ in range(k):
-                val = (val << 1) | next(bits)
-            carrier[idx] = (carrier[idx] & ~mask) | val
-        except StopIteration:
-            break
+    positions = np.asarray(positions_full[:carriers_needed], dtype=np.int64)
+
+    _embed_blob(carrier, positions, blob, k)
 
     cover_ext = os.path.splitext(cover_path)[1].lower().lstrip('.')
-    supported_formats = {
-        'jpg': 'JPEG',
-        'jpeg': 'JPEG',
-        'gif': 'GIF',
-        'png': 'PNG',
-        'bmp': 'BMP'
-    }
-    out_fmt = supported_formats.get(cover_ext, 'PNG')
-    out_ext = cover_ext if cover_ext in supported_formats else 'png'
-    # out_fmt, out_ext = ('PNG', 'png') if cover_ext != 'bmp' else ('BMP', 'bmp')
+    out_fmt, out_ext, note = _FMT.get(cover_ext, ("PNG", "png", None))
     stego_name = f"stego_{os.path.splitext(os.path.basename(cover_path))[0]}.{out_ext}"
     stego_path = os.path.join(os.path.dirname(cover_path), stego_name)
-    Image.frombytes("RGB", (w, h), bytes(carrier)).save(stego_path, format=out_fmt)
+    # Wrap the carrier buffer directly rather than materialising it as bytes first
+    Image.frombuffer("RGB", (w, h), carrier, "raw", "RGB", 0, 1).save(stego_path, format=out_fmt)
 
-    return {
+    result = {
         "ok": True,
         "stego_path": stego_path,
         "embedded_bytes": len(payload),
@@ -180,13 +220,16 @@ def encode_image(cover_path, payload_path, key, lsb_count, start_location):
         "start_xy": [start_x, start_y],
         "stego_format": out_fmt,
     }
+    if note:
+        result["format_note"] = note
+    return result
 
 def decode_image(stego_path, key, lsb_count, start_location=0):
     k = int(lsb_count)
     if not (1 <= k <= 8):
         raise ValueError("LSB count must be between 1 and 8")
 
-    stego_img = ImageOps.exif_transpose(Image.open(stego_path)).convert("RGB")
+    stego_img = _open_rgb(stego_path)
     w, h = stego_img.size
     data = stego_img.tobytes()
     total_carriers = len(data)
@@ -198,41 +241,31 @@ def decode_image(stego_path, key, lsb_count, start_location=0):
     # Scattered extraction: reproduce key-seeded rotation from the same 'start'
     positions = _scattered_positions(total_carriers, start, key, w, h)
     
-    mask = (1 << k) - 1
-    
-    def bit_stream():
-        for idx in positions:
-            v = data[idx] & mask
-            for j in reversed(range(k)):
-                yield (v >> j) & 1
-    
-    MAGIC = b"ACW1"
-    bits = bit_stream()
-    
-    magic = pack_bits_lsb((next(bits) for _ in range(32)))
-    if magic[:4] != MAGIC:
+    data_np = np.frombuffer(data, dtype=np.uint8)
+
+    # Fixed header: MAGIC(4) | KEY_SIG(4) | NAME_LEN(2) | PAYLOAD_LEN(4)
+    hdr = _gather_blob(data_np, positions, k, _HDR.size)
+    magic, key_sig_emb, name_len, length = _HDR.unpack(hdr)
+    if magic != MAGIC:
         raise ValueError("Not a valid stego image for these parameters (MAGIC mismatch).")
-    
-    # Verify key signature (next 4 bytes)
-    key_sig_emb = pack_bits_lsb((next(bits) for _ in range(32)))
+
+    # Verify key signature
     exp_sig = hashlib.sha256(str(key).encode("utf-8", "ignore")).digest()[:4]
-    if key_sig_emb[:4] != exp_sig:
+    if key_sig_emb != exp_sig:
         raise ValueError("Wrong key for this stego image.")
-    
-    # Read name_len(2) + payload_len(4)
-    hdr = pack_bits_lsb((next(bits) for _ in range((2 + 4) * 8)))
-    name_len = int.from_bytes(hdr[:2], "little")
-    length   = int.from_bytes(hdr[2:6], "little")
+
     if not (0 <= name_len <= 65535):
         raise ValueError("Corrupted header (filename length).")
-    # Read filename
-    name_bytes = pack_bits_lsb((next(bits) for _ in range(name_len * 8)))[:name_len]
+
+    # Header + filename + payload in a single bounded gather
+    blob = _gather_blob(data_np, positions, k, _HDR.size + name_len + length)
+    name_bytes = blob[_HDR.size:_HDR.size + name_len]
     try:
         fname = os.path.basename(name_bytes.decode("utf-8", "ignore")).strip() or "payload.bin"
     except Exception:
         fname = "payload.bin"
-    
-    payload = pack_bits_lsb((next(bits) for _ in range(length * 8)))[:length]
+
+    payload = blob[_HDR.size + name_len:]
 
     out_path = os.path.join(os.path.dirname(stego_path), fname)
     with open(out_path, "wb") as f:
@@ -1,6 +1,13 @@
 from math import gcd
 import random
 import hashlib
+from functools import lru_cache
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional; generate_embedding_sequence falls back to random.shuffle
+    njit = None
 
 def _normalize_key_str(key) -> str:
     return str(key).strip().lower()
@@ -117,9 +124,90 @@ def get_embedding_positions(key, data_length, cover_size, lsb_count, start_locat
         idx = (idx + stride) % total
     return out
 
+if njit is not None:
+    @njit(cache=True)
+    def _shuffle_kernel(x, i, words):
+        """
+        Continue random.shuffle's Fisher-Yates pass on 'x' from index 'i' down, drawing
+        randbelow() from raw 32-bit MT outputs in 'words' (getrandbits(k) == word >> (32 - k)).
+        Returns (next i, words consumed); stops early, before a step, if words run out.
+        """
+        n_words = words.size
+        w = 0
+        k = 0
+        n = i + 1
+        while n >> k:
+            k += 1
+        while i > 0:
+            n = i + 1
+            if not n >> (k - 1):
+                k -= 1
+            step_start = w
+            while True:
+                if w >= n_words:
+                    return i, step_start
+                r = words[w] >> (32 - k)
+                w += 1
+                if r < n:
+                    break
+            j = r
+            x[i], x[j] = x[j], x[i]
+            i -= 1
+        return i, w
+else:
+    _shuffle_kernel = None
+
+def _mt_shuffle(x, rng):
+    """In-place shuffle of int64 array 'x' identical to rng.shuffle(list(x))."""
+    i = x.size - 1
+    pending = np.empty(0, dtype=np.uint32)
+    while i > 0:
+        # randbelow() takes ~1.4 words per step on average; draw a bit more than that
+        n_draw = (i * 3) // 2 + 64
+        fresh = np.frombuffer(rng.getrandbits(32 * n_draw).to_bytes(4 * n_draw, 'little'), dtype='<u4')
+        words = np.concatenate((pending, fresh)) if pending.size else fresh
+        i, used = _shuffle_kernel(x, i, words)
+        pending = words[used:]
+
+def _shuffled_range(rng, start, stop):
+    """
+    range(start, stop) permuted exactly as rng.shuffle(list(range(start, stop))) would.
+    Returns an int64 array (Numba kernel), or a list when numba is unavailable.
+    The kernel draws words ahead, so 'rng' is left in a different state than
+    after rng.shuffle(); it is used up and must not be drawn from again.
+    """
+    if _shuffle_kernel is None or stop - start > 2 ** 32:
+        out = list(range(start, stop))
+        rng.shuffle(out)
+        return out
+    out = np.arange(start, stop, dtype=np.int64)
+    _mt_shuffle(out, rng)
+    return out
+
+# Orders up to this many slots (8 MB as int64) are kept; larger ones are rebuilt each call
+_PERMUTATION_CACHE_SLOTS = 1 << 20
+
+def _seeded_permutation(seed, start, stop):
+    out = _shuffled_range(random.Random(seed), start, stop)
+    if isinstance(out, list):
+        return tuple(out)
+    out.flags.writeable = False
+    return out
+
+_cached_permutation = lru_cache(maxsize=4)(_seeded_permutation)
+
+def seeded_permutation(seed, start, stop):
+    """
+    _shuffled_range() for a fresh random.Random(seed), returned read-only
+    (a tuple on the list fallback). Small orders are cached per (seed, start,
+    stop), so e.g. retrying an image decode with another LSB count skips the
+    shuffle; at most 4 x 8 MB is ever held.
+    """
+    if stop - start > _PERMUTATION_CACHE_SLOTS:
+        return _seeded_permutation(seed, start, stop)
+    return _cached_permutation(seed, start, stop)
+
 def generate_embedding_sequence(key, data_length, cover_size, start_location=0):
     """Generate a pseudo-random embedding sequence based on the key"""
-    random.seed(key_to_int(key))
-    positions = list(range(start_location, cover_size))
-    random.shuffle(positions)
-    return positions[:data_length]
+    # Private generator seeded exactly as random.seed() would be
+    return seeded_permutation(key_to_int(key), start_location, cover_size)[:data_length]
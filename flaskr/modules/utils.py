@@ -1,6 +1,8 @@
 import os
 import struct
 import hashlib
+import warnings
+import numpy as np
 from PIL import Image
 import wave
 
@@ -36,18 +38,33 @@ def pack_bits_lsb(bits_iter):
         out.append(val)
     return bytes(out)
 
+def _as_bit_array(bits):
+    """
+    Coerce a bit sequence to a bool array (1 -> True, anything else -> False).
+    '0'/'1' string bits are still accepted but deprecated; they are converted once.
+    """
+    if isinstance(bits, np.ndarray):
+        arr = bits
+    else:
+        arr = np.asarray(bits if isinstance(bits, (list, tuple)) else list(bits))
+    if arr.dtype.kind in 'US':
+        warnings.warn("String bits ('0'/'1') are deprecated; pass ints 0/1 instead.",
+                      DeprecationWarning, stacklevel=3)
+        return arr == '1'
+    return arr == 1
+
 def bytes_to_bits(data: bytes):
     """
-    Convert bytes -> list of bits (LSB-first), as INTs 0/1.
+    Convert bytes -> uint8 array of bits (LSB-first), values 0/1.
     """
-    return [((b >> i) & 1) for b in data for i in range(8)]
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
 
 def bits_to_bytes(bits):
     """
-    Convert list/iter of bits (LSB-first) -> bytes.
-    Accepts ints 0/1 OR '0'/'1' strings.
+    Convert array/list/iter of bits (LSB-first) -> bytes.
+    A trailing partial byte is zero-padded in its high bits.
     """
-    return pack_bits_lsb(bits)
+    return np.packbits(_as_bit_array(bits), bitorder='little').tobytes()
 
 def string_to_bits(text: str):
     """
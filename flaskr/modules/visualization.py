@@ -1,75 +1,277 @@
 import matplotlib
 matplotlib.use('Agg')  # Use non-GUI backend
 import matplotlib.pyplot as plt
+# Diagnostic plots only: skip hinting/text AA, simplify long paths, no implicit layout pass
+plt.rcParams.update({
+    'text.hinting': 'none',
+    'text.antialiased': False,
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+    'figure.autolayout': False,
+    'axes.grid': False,
+})
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
 from PIL import Image, ImageOps
 import io
-import base64
 import cv2
 import os
-from scipy import stats
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from scipy import signal, special
 import librosa
 import soundfile as sf
 
-def generate_difference_map(cover_path, stego_path):
-    """Generate visual difference map between cover and stego images"""
+try:
+    import pybase64 as base64  # SIMD encoder, same b64encode API
+except ImportError:
+    import base64
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba normally arrives with librosa; fall back to the NumPy reductions
+    njit = None
+
+# Waveform columns actually drawn (~ figure width x dpi, with headroom)
+_WAVEFORM_COLUMNS = 2400
+
+# PNG encode settings (IMWRITE_PNG_FILTER only exists in newer OpenCV builds)
+_PNG_PARAMS = [cv2.IMWRITE_PNG_COMPRESSION, 3]
+if hasattr(cv2, 'IMWRITE_PNG_FILTER'):
+    _PNG_PARAMS += [cv2.IMWRITE_PNG_FILTER, cv2.IMWRITE_PNG_FILTER_NONE]
+
+# Idle pre-built figures keyed by (nrows, ncols, figsize). The threaded server runs each
+# request on a fresh thread, so the pool is shared and figures are checked out under a lock.
+_FIG_POOL = {}
+_FIG_LOCK = threading.Lock()
+
+def _get_fig(nrows, ncols, figsize):
+    """Check out a pooled (fig, axes) grid, cleared for reuse; _figure_to_base64 returns it"""
+    key = (nrows, ncols, tuple(figsize))
+    with _FIG_LOCK:
+        idle = _FIG_POOL.get(key)
+        entry = idle.pop() if idle else None
+    if entry is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(nrows, ncols)
+        specs = [ax.get_subplotspec() for ax in np.ravel(axes)]
+        params = {k: getattr(fig.subplotpars, k) for k in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+        fig._pool_entry = (key, (fig, axes, specs, params))
+        return fig, axes
+    
+    fig, axes, specs, params = entry
+    grid = list(np.ravel(axes))
+    # Drop extra axes (e.g. colorbars) and restore any subplotspec they stole space from
+    for ax in fig.axes:
+        if ax not in grid:
+            ax.remove()
+    for ax, spec in zip(grid, specs):
+        ax.cla()
+        ax.set_subplotspec(spec)
+    # tight_layout() starts from the current params, so reset them for identical output
+    fig.subplots_adjust(**params)
+    return fig, axes
+
+def _release_fig(fig):
+    """Return a figure from _get_fig to the idle pool"""
+    key, entry = fig._pool_entry
+    with _FIG_LOCK:
+        _FIG_POOL.setdefault(key, []).append(entry)
+
+def _figure_to_base64(fig, dpi=100, fmt='PNG'):
+    """Render a figure on its Agg canvas and return it base64-encoded (single encode, no bbox pass).
+
+    PNG keeps pixel-exact plots; JPEG is used where plot quality is non-critical.
+    The figure goes back to the pool once its pixels are encoded.
+    """
     try:
-        # Read images with EXIF orientation respected
-        with Image.open(cover_path) as cim:
-            cover_rgb = np.array(ImageOps.exif_transpose(cim).convert('RGB'))
-        with Image.open(stego_path) as sim:
-            stego_rgb = np.array(ImageOps.exif_transpose(sim).convert('RGB'))
-        
-        # Calculate absolute difference
-        diff_img = np.abs(cover_rgb.astype(np.int16) - stego_rgb.astype(np.int16))
-        
-        # Create enhanced difference map (amplify small changes)
-        enhanced_diff = np.clip(diff_img * 50, 0, 255).astype(np.uint8)
+        fig.set_dpi(dpi)
+        fig.canvas.draw()
+        rgba = np.asarray(fig.canvas.buffer_rgba())
+        if fmt == 'JPEG':
+            buffer = io.BytesIO()
+            Image.fromarray(rgba[..., :3], 'RGB').save(buffer, format='JPEG', quality=85, subsampling=2)
+            return base64.b64encode(buffer.getbuffer()).decode('ascii')
+        # Figures are opaque, so drop alpha; libpng at level 3 with no per-row filter search
+        ok, png = cv2.imencode('.png', cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR), _PNG_PARAMS)
+        if not ok:
+            raise ValueError("PNG encoding failed")
+        return base64.b64encode(png.data).decode('ascii')
+    finally:
+        _release_fig(fig)
+
+
+def _block_changes_np(img, block_size):
+    """Horizontal + vertical change counts per block, shape (nby, nbx)"""
+    nby, nbx = img.shape[0] // block_size, img.shape[1] // block_size
+    # Crop to whole blocks and view as a (nby, nbx, bs, bs) block grid
+    blocks = img[:nby * block_size, :nbx * block_size].reshape(
+        nby, block_size, nbx, block_size).swapaxes(1, 2)
+    h_changes = (np.diff(blocks, axis=3) != 0).sum(axis=(2, 3))
+    v_changes = (np.diff(blocks, axis=2) != 0).sum(axis=(2, 3))
+    return h_changes + v_changes
+
+
+def _segment_ones_np(lsb, win):
+    """Count of set LSBs in each non-overlapping window of 'win' samples"""
+    n_segments = lsb.size // win
+    return lsb[:n_segments * win].reshape(-1, win).sum(axis=1, dtype=np.int32)
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _block_changes(img, block_size):
+        nby, nbx = img.shape[0] // block_size, img.shape[1] // block_size
+        out = np.zeros((nby, nbx), dtype=np.int64)
+        for by in prange(nby):
+            y0 = by * block_size
+            for bx in range(nbx):
+                x0 = bx * block_size
+                changes = 0
+                for r in range(block_size):
+                    for c in range(block_size):
+                        v = img[y0 + r, x0 + c]
+                        if c + 1 < block_size and v != img[y0 + r, x0 + c + 1]:
+                            changes += 1
+                        if r + 1 < block_size and v != img[y0 + r + 1, x0 + c]:
+                            changes += 1
+                out[by, bx] = changes
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _segment_ones(lsb, win):
+        n_segments = lsb.size // win
+        out = np.zeros(n_segments, dtype=np.int32)
+        for s in prange(n_segments):
+            acc = 0
+            for i in range(s * win, (s + 1) * win):
+                acc += lsb[i]
+            out[s] = acc
+        return out
+else:
+    _block_changes = _block_changes_np
+    _segment_ones = _segment_ones_np
+
+
+def _plot_waveform(ax, t, y, color, alpha, linewidth, columns=_WAVEFORM_COLUMNS):
+    """Plot a waveform; long signals are drawn as a min/max envelope at screen resolution"""
+    n = len(y)
+    if n < 4 * columns:
+        ax.plot(t, y, color=color, alpha=alpha, linewidth=linewidth)
+        return
+    bin_size = -(-n // columns)
+    rows = -(-n // bin_size)
+    blocks = np.pad(y, (0, rows * bin_size - n), mode='edge').reshape(rows, bin_size)
+    ax.fill_between(t[::bin_size], blocks.min(axis=1), blocks.max(axis=1),
+                    color=color, alpha=alpha, linewidth=0)
+
+
+def _pil_rgb(path):
+    """Decode an image as RGB with EXIF orientation respected"""
+    with Image.open(path) as im:
+        return np.array(ImageOps.exif_transpose(im).convert('RGB'))
+
+def read_image_rgb(path):
+    """Decode an image once as an RGB uint8 array (None if unreadable), for the rgb= parameters"""
+    img = cv2.imread(path)
+    if img is None:
+        return None
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+def read_image_gray(path):
+    """Decode an image once as a grayscale uint8 array (None if unreadable), for the gray= parameters"""
+    return cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+
+def _channel_counts(rgb):
+    """Per-channel 256-bin counts of an HxWx3 uint8 image, shape (3, 256)"""
+    if rgb.shape[0] * rgb.shape[1] < (1 << 24):
+        # calcHist walks the interleaved buffer directly (no per-channel copy);
+        # its float32 bins are exact below 2**24 pixels
+        return np.stack([cv2.calcHist([rgb], [c], None, [256], [0, 256]).ravel()
+                         for c in range(3)]).astype(np.int64)
+    return np.stack([np.bincount(rgb[:, :, c].ravel(), minlength=256) for c in range(3)])
+
+def _fit_to_axes(img, max_w, max_h, interpolation=cv2.INTER_AREA):
+    """Shrink an image to fit max_w x max_h (aspect kept, never upscaled) before imshow"""
+    h, w = img.shape[:2]
+    scale = min(max_w / w, max_h / h)
+    if scale >= 1.0:
+        return img
+    size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    return cv2.resize(img, size, interpolation=interpolation)
+
+def generate_difference_map(cover_path, stego_path, cover_rgb=None, stego_rgb=None):
+    """Generate visual difference map between cover and stego images (optionally pre-decoded RGB)"""
+    try:
+        # Read images with EXIF orientation respected; the two decodes are
+        # independent and PIL's decoders release the GIL
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            cover_fut = ex.submit(_pil_rgb, cover_path) if cover_rgb is None else None
+            stego_fut = ex.submit(_pil_rgb, stego_path) if stego_rgb is None else None
+            if cover_fut is not None:
+                cover_rgb = cover_fut.result()
+            if stego_fut is not None:
+                stego_rgb = stego_fut.result()
+        
+        # Calculate absolute difference (uint8 in, uint8 out)
+        diff_img = cv2.absdiff(cover_rgb, stego_rgb)
+        
+        # Create enhanced difference map (amplify small changes, saturating at 255)
+        enhanced_diff = cv2.convertScaleAbs(diff_img, alpha=50.0)
         
         # Create black-white filtering for LSB analysis (from lecture)
         # Even values = black (0), odd values = white (255)
-        cover_bw = np.where(cover_rgb % 2 == 0, 0, 255).astype(np.uint8)
-        stego_bw = np.where(stego_rgb % 2 == 0, 0, 255).astype(np.uint8)
+        cover_lsb = cover_rgb & 1
+        stego_lsb = stego_rgb & 1
+        cover_bw = cover_lsb * np.uint8(255)
+        stego_bw = stego_lsb * np.uint8(255)
         
         # Create subplot visualization
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+        fig, axes = _get_fig(2, 3, (15, 10))
+        
+        # Each axes covers ~figsize*dpi/grid pixels; anything larger is resampled away by Agg
+        max_w = int(15 * 100 / 3)
+        max_h = int(10 * 100 / 2)
+        # Area-average the photos, nearest-sample the 0/255 planes so they stay binary
+        smooth = lambda a: _fit_to_axes(a, max_w, max_h, cv2.INTER_AREA)
+        binary = lambda a: _fit_to_axes(a, max_w, max_h, cv2.INTER_NEAREST)
         
         # Original images
-        axes[0,0].imshow(cover_rgb)
+        axes[0,0].imshow(smooth(cover_rgb))
         axes[0,0].set_title('Cover Image')
         axes[0,0].axis('off')
         
-        axes[0,1].imshow(stego_rgb)
+        axes[0,1].imshow(smooth(stego_rgb))
         axes[0,1].set_title('Stego Image')
         axes[0,1].axis('off')
         
-        axes[0,2].imshow(enhanced_diff)
+        axes[0,2].imshow(smooth(enhanced_diff))
         axes[0,2].set_title('Difference Map (Enhanced)')
         axes[0,2].axis('off')
         
         # LSB analysis (black-white filtering)
-        axes[1,0].imshow(cover_bw, cmap='gray')
+        axes[1,0].imshow(binary(cover_bw), cmap='gray')
         axes[1,0].set_title('Cover LSB Plane (Even=Black, Odd=White)')
         axes[1,0].axis('off')
         
-        axes[1,1].imshow(stego_bw, cmap='gray')
+        axes[1,1].imshow(binary(stego_bw), cmap='gray')
         axes[1,1].set_title('Stego LSB Plane')
         axes[1,1].axis('off')
         
         # LSB difference
-        lsb_diff = np.abs(cover_bw.astype(np.int16) - stego_bw.astype(np.int16))
-        axes[1,2].imshow(lsb_diff, cmap='hot')
+        # XOR of the LSBs gives the 0/255 change mask without widening
+        lsb_diff = np.bitwise_xor(cover_lsb, stego_lsb) * np.uint8(255)
+        axes[1,2].imshow(binary(lsb_diff), cmap='hot')
         axes[1,2].set_title('LSB Changes (Hot = Modified)')
         axes[1,2].axis('off')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Convert to base64 for web display
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        img_base64 = _figure_to_base64(fig)
         
         return img_base64
         
@@ -78,79 +280,81 @@ def generate_difference_map(cover_path, stego_path):
         return None
 
 
-def create_histogram_analysis(image_path, channels=['R', 'G', 'B'], stego_path=None):
-    """Create histogram analysis like the lecture image"""
+def create_histogram_analysis(image_path, channels=['R', 'G', 'B'], stego_path=None, rgb=None, stego_rgb=None):
+    """Create histogram analysis like the lecture image (optionally from pre-decoded RGB)"""
     try:
         # Read cover image
-        cover_img = cv2.imread(image_path)
-        if cover_img is None:
+        cover_rgb = rgb if rgb is not None else read_image_rgb(image_path)
+        if cover_rgb is None:
             return None
-            
-        cover_rgb = cv2.cvtColor(cover_img, cv2.COLOR_BGR2RGB)
         
         # Read stego image if provided
-        stego_rgb = None
-        if stego_path and os.path.exists(stego_path):
-            stego_img = cv2.imread(stego_path)
-            if stego_img is not None:
-                stego_rgb = cv2.cvtColor(stego_img, cv2.COLOR_BGR2RGB)
+        if stego_rgb is None and stego_path and os.path.exists(stego_path):
+            stego_rgb = read_image_rgb(stego_path)
         
         # Create figure with subplots (similar to lecture layout)
         if stego_rgb is not None:
-            fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+            fig, axes = _get_fig(2, 3, (18, 12))
         else:
-            fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+            fig, axes = _get_fig(1, 3, (18, 6))
             axes = [axes]  # Make it 2D for consistent indexing
         
         colors = ['red', 'green', 'blue']
         channel_names = ['Red', 'Green', 'Blue']
+        # One filled step artist per histogram instead of 256 bar patches
+        bin_edges = np.arange(257)
+        levels = bin_edges[:-1]
+        
+        # All channel histograms up front; plots and statistics reuse them
+        cover_hists = _channel_counts(cover_rgb)
+        stego_hists = _channel_counts(stego_rgb) if stego_rgb is not None else None
         
         # Analyze each channel
         for i, (color, channel_name) in enumerate(zip(colors, channel_names)):
             # Cover image histogram
-            channel_data = cover_rgb[:, :, i].flatten()
+            cover_counts = cover_hists[i]
+            n_pixels = int(cover_counts.sum())
             
-            axes[0][i].hist(channel_data, bins=256, range=[0, 256], 
-                           color=color, alpha=0.7, density=True)
+            axes[0][i].stairs(cover_counts / n_pixels, bin_edges, fill=True,
+                              color=color, alpha=0.7)
             axes[0][i].set_title(f'Cover Image - {channel_name} Channel Histogram')
             axes[0][i].set_xlabel('Pixel Intensity')
             axes[0][i].set_ylabel('Normalized Frequency')
             axes[0][i].grid(True, alpha=0.3)
             
-            # Add statistics text
-            stats_text = f'Mean: {np.mean(channel_data):.1f}\nStd: {np.std(channel_data):.1f}\nPixels: {len(channel_data)}'
+            # Add statistics text (moments from the 256 counts, not another pass over the pixels)
+            mean = float(cover_counts @ levels) / n_pixels
+            std = float(np.sqrt(cover_counts @ (levels - mean) ** 2 / n_pixels))
+            stats_text = f'Mean: {mean:.1f}\nStd: {std:.1f}\nPixels: {n_pixels}'
             axes[0][i].text(0.02, 0.98, stats_text, transform=axes[0][i].transAxes, 
                            verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
             
             # Stego image histogram (if available)
             if stego_rgb is not None:
-                stego_channel_data = stego_rgb[:, :, i].flatten()
+                stego_counts = stego_hists[i]
                 
-                axes[1][i].hist(stego_channel_data, bins=256, range=[0, 256], 
-                               color=color, alpha=0.7, density=True)
+                axes[1][i].stairs(stego_counts / stego_counts.sum(), bin_edges, fill=True,
+                                  color=color, alpha=0.7)
                 axes[1][i].set_title(f'Stego Image - {channel_name} Channel Histogram')
                 axes[1][i].set_xlabel('Pixel Intensity')
                 axes[1][i].set_ylabel('Normalized Frequency')
                 axes[1][i].grid(True, alpha=0.3)
                 
-                # Calculate and display statistical differences
-                chi2_stat, p_value = stats.chisquare(
-                    np.histogram(stego_channel_data, bins=256, range=[0, 256])[0],
-                    np.histogram(channel_data, bins=256, range=[0, 256])[0]
-                )
+                # Calculate and display statistical differences (reusing the plotted counts)
+                # Only bins the cover populates carry an expected count; df follows them
+                mask = cover_counts > 0
+                diff = stego_counts[mask].astype(np.float64) - cover_counts[mask]
+                chi2_stat = float(np.sum(diff ** 2 / cover_counts[mask]))
+                p_value = float(special.chdtrc(max(int(mask.sum()) - 1, 1), chi2_stat))
                 
-                diff_stats_text = f'Mean: {np.mean(stego_channel_data):.1f}\nChi²: {chi2_stat:.2e}\np-val: {p_value:.2e}'
+                diff_stats_text = f'Mean: {float(stego_counts @ levels) / stego_counts.sum():.1f}\nChi²: {chi2_stat:.2e}\np-val: {p_value:.2e}'
                 axes[1][i].text(0.02, 0.98, diff_stats_text, transform=axes[1][i].transAxes, 
                                verticalalignment='top', bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.8))
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        img_base64 = _figure_to_base64(fig, fmt='JPEG')
         
         return img_base64
         
@@ -159,23 +363,27 @@ def create_histogram_analysis(image_path, channels=['R', 'G', 'B'], stego_path=N
         return None
 
 
-def extract_bit_planes(image_path):
-    """Extract all 8 bit planes as shown in lecture"""
+def extract_bit_planes(image_path, gray=None):
+    """Extract all 8 bit planes as shown in lecture (optionally from a pre-decoded gray array)"""
     try:
-        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        img = gray if gray is not None else read_image_gray(image_path)
         if img is None:
             return None
             
         # Create figure for 8 bit planes (2x4 layout)
-        fig, axes = plt.subplots(2, 4, figsize=(16, 8))
+        fig, axes = _get_fig(2, 4, (16, 8))
+        
+        # Nearest-sample down to the ~400x400 axes first, so only displayed pixels are unpacked
+        img = _fit_to_axes(img, int(16 * 100 / 4), int(8 * 100 / 2), cv2.INTER_NEAREST)
+        
+        # Unpack all bit planes in one pass, plane-major (8 x H x W) so each is contiguous, scaled to 0-255
+        planes = np.unpackbits(img[None], axis=0, bitorder='little') * np.uint8(255)
         
         for bit in range(8):
-            # Extract bit plane
-            bit_plane = (img >> bit) & 1
-            bit_plane = bit_plane * 255  # Scale to 0-255 for visibility
-            
             row, col = divmod(bit, 4)
-            axes[row, col].imshow(bit_plane, cmap='gray')
+            # 0/255 planes go in as grey RGB views: no normalisation or colormap lookup in Agg
+            plane = planes[bit]
+            axes[row, col].imshow(np.broadcast_to(plane[..., None], plane.shape + (3,)))
             
             if bit == 0:
                 axes[row, col].set_title(f'Bit Plane {bit} (LSB)')
@@ -186,15 +394,11 @@ def extract_bit_planes(image_path):
             
             axes[row, col].axis('off')
         
-        plt.suptitle('Bit Plane Analysis - Individual Bit Planes', fontsize=16)
-        plt.tight_layout()
+        fig.suptitle('Bit Plane Analysis - Individual Bit Planes', fontsize=16)
+        fig.tight_layout()
         
         # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        img_base64 = _figure_to_base64(fig)
         
         return img_base64
         
@@ -203,12 +407,22 @@ def extract_bit_planes(image_path):
         return None
 
 
+def _read_audio_mono(path):
+    """float32 mono samples at the native rate; librosa when libsndfile can't decode (e.g. mp3)"""
+    try:
+        audio, sr = sf.read(path, dtype='float32', always_2d=False)
+    except Exception:
+        return librosa.load(path, sr=None, mono=True)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    return audio, sr
+
 def create_waveform_comparison(cover_audio_path, stego_audio_path):
     """Compare audio waveforms before and after embedding with correct time scaling"""
     try:
-        # Load audio files (preserve original sample rate)
-        cover_audio, cover_sr = librosa.load(cover_audio_path, sr=None)
-        stego_audio, stego_sr = librosa.load(stego_audio_path, sr=None)
+        # Load audio files (preserve original sample rate, downmix to mono)
+        cover_audio, cover_sr = _read_audio_mono(cover_audio_path)
+        stego_audio, stego_sr = _read_audio_mono(stego_audio_path)
         
         # Ensure both files have the same sample rate
         if cover_sr != stego_sr:
@@ -220,9 +434,9 @@ def create_waveform_comparison(cover_audio_path, stego_audio_path):
             print("One or both audio files are empty")
             return None
             
-        # Create time arrays for waveforms
-        cover_time = np.linspace(0, len(cover_audio) / cover_sr, len(cover_audio))
-        stego_time = np.linspace(0, len(stego_audio) / stego_sr, len(stego_audio))
+        # Create time arrays for waveforms (sample i at i / sr)
+        cover_time = np.arange(len(cover_audio), dtype=np.float32) * np.float32(1.0 / cover_sr)
+        stego_time = np.arange(len(stego_audio), dtype=np.float32) * np.float32(1.0 / stego_sr)
         
         # Calculate difference (truncate to shorter length)
         min_len = min(len(cover_audio), len(stego_audio))
@@ -231,31 +445,31 @@ def create_waveform_comparison(cover_audio_path, stego_audio_path):
             return None
             
         audio_diff = stego_audio[:min_len] - cover_audio[:min_len]
-        diff_time = np.linspace(0, min_len / cover_sr, min_len)
+        diff_time = np.arange(min_len, dtype=np.float32) * np.float32(1.0 / cover_sr)
         
-        # STFT parameters for consistent time scaling
+        # STFT parameters: hop grows with length so frames stay near the drawn width
         n_fft = 2048
-        hop_length = 512
+        hop_length = min(n_fft, max(512, min_len // _WAVEFORM_COLUMNS))
         
         # Create visualization with better layout
-        fig, axes = plt.subplots(4, 1, figsize=(16, 12))
+        fig, axes = _get_fig(4, 1, (16, 12))
         
         # Cover waveform
-        axes[0].plot(cover_time, cover_audio, color='blue', alpha=0.7, linewidth=0.5)
+        _plot_waveform(axes[0], cover_time, cover_audio, color='blue', alpha=0.7, linewidth=0.5)
         axes[0].set_title('Cover Audio Waveform', fontsize=12, fontweight='bold')
         axes[0].set_ylabel('Amplitude')
         axes[0].grid(True, alpha=0.3)
         axes[0].set_xlim(0, max(cover_time[-1], stego_time[-1]) if len(cover_time) > 0 and len(stego_time) > 0 else 1)
         
         # Stego waveform
-        axes[1].plot(stego_time, stego_audio, color='red', alpha=0.7, linewidth=0.5)
+        _plot_waveform(axes[1], stego_time, stego_audio, color='red', alpha=0.7, linewidth=0.5)
         axes[1].set_title('Stego Audio Waveform', fontsize=12, fontweight='bold')
         axes[1].set_ylabel('Amplitude')
         axes[1].grid(True, alpha=0.3)
         axes[1].set_xlim(0, max(cover_time[-1], stego_time[-1]) if len(cover_time) > 0 and len(stego_time) > 0 else 1)
         
         # Difference waveform with enhanced visibility
-        axes[2].plot(diff_time, audio_diff, color='green', alpha=0.8, linewidth=0.6)
+        _plot_waveform(axes[2], diff_time, audio_diff, color='green', alpha=0.8, linewidth=0.6)
         axes[2].set_title('Difference Waveform (Stego - Cover)', fontsize=12, fontweight='bold')
         axes[2].set_ylabel('Amplitude Difference')
         axes[2].grid(True, alpha=0.3)
@@ -266,19 +480,16 @@ def create_waveform_comparison(cover_audio_path, stego_audio_path):
         
         # Fixed spectrogram with correct time scaling
         if len(audio_diff) >= n_fft:  # Ensure we have enough samples for STFT
-            D = librosa.stft(audio_diff, n_fft=n_fft, hop_length=hop_length, center=True)
-            S_db = librosa.amplitude_to_db(np.abs(D), ref=np.max)
+            # Zero-padded boundaries centre the frames, so t is already in seconds from 0
+            f, t, D = signal.stft(audio_diff, fs=cover_sr, nperseg=n_fft,
+                                  noverlap=n_fft - hop_length, padded=False)
+            mag = np.abs(D)
+            ref = mag.max() or 1.0
+            # dB relative to the peak, floored 80 dB down (as librosa.amplitude_to_db)
+            S_db = np.maximum(20 * np.log10(np.maximum(mag, 1e-10) / ref), -80.0)
             
-            # CRITICAL FIX: Pass sr and hop_length to specshow for correct time axis
-            img = librosa.display.specshow(
-                S_db, 
-                sr=cover_sr,           # Use actual sample rate
-                hop_length=hop_length, # Use same hop_length as STFT
-                x_axis='time', 
-                y_axis='hz', 
-                ax=axes[3],
-                cmap='viridis'         # Better colormap for visibility
-            )
+            img = axes[3].pcolormesh(t, f, S_db, cmap='viridis', shading='auto')
+            axes[3].set_ylabel('Hz')
             axes[3].set_title('Difference Spectrogram', fontsize=12, fontweight='bold')
             
             # Add colorbar with proper formatting
@@ -302,15 +513,10 @@ def create_waveform_comparison(cover_audio_path, stego_audio_path):
         fig.suptitle(f'Audio Waveform Comparison\n{duration_text}', fontsize=14, y=0.98)
         
         # Improve layout
-        plt.tight_layout(rect=[0, 0, 1, 0.95])  # Leave space for suptitle
+        fig.tight_layout(rect=[0, 0, 1, 0.95])  # Leave space for suptitle
         
         # Convert to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        buffer.seek(0)
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        plt.close()
+        img_base64 = _figure_to_base64(fig, fmt='JPEG')
         
         return img_base64
         
@@ -328,11 +534,22 @@ def calculate_capacity_info(file_path, file_type, lsb_count=1):
         
         if file_type.lower() in ['png', 'bmp', 'tiff', 'jpg', 'jpeg']:
             # Image capacity calculation (from lecture)
-            img = cv2.imread(file_path)
-            if img is None:
-                return None
-                
-            height, width, channels = img.shape
+            # Header-only read: PIL defers pixel decode until .load()
+            with Image.open(file_path) as im:
+                width, height = im.size
+                # EXIF rotations by 90/270 degrees swap the displayed dimensions. getexif()
+                # is parsed from the header only for these formats; on PNG it would load() the
+                # pixels, so use the eXIf chunk if it came before the image data
+                if im.format in ('JPEG', 'TIFF', 'MPO', 'WEBP'):
+                    exif = im.getexif()
+                else:
+                    exif = Image.Exif()
+                    if im.info.get('exif'):
+                        exif.load(im.info['exif'])
+                if exif.get(0x0112, 1) in (5, 6, 7, 8):
+                    width, height = height, width
+            # The encoder always embeds into an RGB copy of the cover
+            channels = 3
             
             # Maximum bytes calculation from lecture: n_bytes = width * height * channels // 8
             total_pixels = width * height
@@ -352,18 +569,19 @@ def calculate_capacity_info(file_path, file_type, lsb_count=1):
             }
             
         elif file_type.lower() in ['wav', 'pcm']:
-            # Audio capacity calculation
-            audio_data, sample_rate = librosa.load(file_path, sr=None)
-            total_samples = len(audio_data)
+            # Audio capacity calculation (header only, no sample decode)
+            info = sf.info(file_path)
+            sample_rate = info.samplerate
+            total_samples = info.frames * info.channels
             
-            # For 16-bit audio, we can use LSB of each sample
+            # For 16-bit audio, we can use LSB of each (interleaved) sample
             total_bits_available = total_samples * lsb_count
             max_bytes = total_bits_available // 8
             
             capacity_info = {
                 'file_type': 'audio',
                 'sample_rate': sample_rate,
-                'duration_seconds': len(audio_data) / sample_rate,
+                'duration_seconds': info.duration,
                 'total_samples': total_samples,
                 'lsb_bits_used': lsb_count,
                 'total_bits_available': total_bits_available,
@@ -388,32 +606,25 @@ def analyze_stego_detection(file_path, file_type):
             try:
                 audio, sr = sf.read(file_path, dtype='int16', always_2d=False)
                 if audio.ndim > 1:
-                    audio = audio.mean(axis=1).astype(np.int16)
-                samples = audio.astype(np.int32)
+                    # LSBs live per channel; a float mean would scramble them
+                    audio = audio[:, 0]
             except Exception:
                 y, sr = librosa.load(file_path, sr=None, mono=True)
-                samples = (np.clip(y, -1, 1) * 32767.0).astype(np.int32)
+                audio = (np.clip(y, -1, 1) * 32767.0).astype(np.int16)
 
-            if samples.size == 0:
+            # Only the LSB plane is needed
+            lsb = (audio & 1).astype(np.uint8)
+            if lsb.size == 0:
                 return analysis_results
-
-            # Simple but effective approach
-            lsb = samples & 1
-            ones = int(lsb.sum())
-            zeros = int(lsb.size - ones)
             
             # Key insight: Check LSB distribution in segments
             win = 8192  # Larger window for stability
-            step = win
             
-            segment_biases = []
-            for start in range(0, lsb.size - win + 1, step):
-                seg = lsb[start:start+win]
-                seg_ones = int(seg.sum())
-                seg_bias = abs((seg_ones / len(seg)) - 0.5)
-                segment_biases.append(seg_bias)
+            # Non-overlapping windows: reduce all segments in one pass
+            seg_ones = _segment_ones(lsb, win)
+            segment_biases = np.abs(seg_ones / win - 0.5)
             
-            if not segment_biases:
+            if segment_biases.size == 0:
                 return analysis_results
             
             # Simple decision metrics
@@ -423,8 +634,8 @@ def analyze_stego_detection(file_path, file_type):
             std_bias = float(np.std(segment_biases))
             
             # Count segments that are "too balanced" (suspicious for embedding)
-            very_balanced_segments = sum(1 for b in segment_biases if b < 0.01)
-            balanced_ratio = very_balanced_segments / len(segment_biases)
+            very_balanced_segments = int((segment_biases < 0.01).sum())
+            balanced_ratio = very_balanced_segments / segment_biases.size
             
             # Simple scoring logic
             stego_indicators = 0
@@ -471,7 +682,7 @@ def analyze_stego_detection(file_path, file_type):
                 'file_type': 'audio',
                 'sample_rate': int(sr) if sr else None,
                 'audio_metrics': {
-                    'segments_analyzed': len(segment_biases),
+                    'segments_analyzed': int(segment_biases.size),
                     'avg_bias': avg_bias,
                     'min_bias': min_bias,
                     'max_bias': max_bias,
@@ -491,39 +702,36 @@ def analyze_stego_detection(file_path, file_type):
         print(f"Error in steganalysis detection: {str(e)}")
         return {'detection_confidence': 'unknown'}
 
-def analyze_complexity_segments(image_path, block_size=8, threshold=0.3):
-    """Analyze BPCS complexity segments as described in lecture"""
+def analyze_complexity_segments(image_path, block_size=8, threshold=0.3, gray=None):
+    """Analyze BPCS complexity segments as described in lecture (optionally from a pre-decoded gray array)"""
     try:
-        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        img = gray if gray is not None else read_image_gray(image_path)
         if img is None:
             return None
             
         height, width = img.shape
-        complexity_data = []
+        nby, nbx = height // block_size, width // block_size
         
-        for i in range(0, height - block_size + 1, block_size):
-            for j in range(0, width - block_size + 1, block_size):
-                block = img[i:i+block_size, j:j+block_size]
-                
-                # Calculate complexity (from lecture: c = actual changes / 112)
-                h_changes = np.sum(np.abs(np.diff(block, axis=1)) > 0)
-                v_changes = np.sum(np.abs(np.diff(block, axis=0)) > 0)
-                
-                total_changes = h_changes + v_changes
-                max_changes = 2 * block_size * (block_size - 1)  # 112 for 8x8 block
-                
-                complexity = total_changes / max_changes if max_changes > 0 else 0
-                complexity_data.append({
-                    'x': j, 'y': i,
-                    'complexity': complexity,
-                    'is_complex': complexity > threshold
-                })
+        # Calculate complexity for every block at once (from lecture: c = actual changes / 112)
+        total_changes = _block_changes(img, block_size)
+        max_changes = 2 * block_size * (block_size - 1)  # 112 for 8x8 block
+        if max_changes > 0:
+            complexity = total_changes / max_changes
+        else:
+            complexity = np.zeros((nby, nbx))
+        is_complex = complexity > threshold
+        
+        # Block origins in row-major order; parallel arrays (convert_numpy_types lists them for JSON)
+        ys, xs = np.meshgrid(np.arange(nby) * block_size, np.arange(nbx) * block_size, indexing='ij')
         
         return {
-            'complexity_data': complexity_data,
+            'x': xs.ravel(),
+            'y': ys.ravel(),
+            'complexity': complexity.ravel(),
+            'is_complex': is_complex.ravel(),
             'threshold': threshold,
-            'total_blocks': len(complexity_data),
-            'complex_blocks': sum(1 for block in complexity_data if block['is_complex'])
+            'total_blocks': int(complexity.size),
+            'complex_blocks': int(is_complex.sum())
         }
         
     except Exception as e: